@@ -12,6 +12,7 @@ class Grid:
         self.size = args["objectSize"]
         self.width = self.maximum.x - self.minimum.x
         self.height = self.maximum.y - self.minimum.y
+        self.rng = np.random.default_rng(args["seed"])
 
     def generateBoundaries(self):
         dimension = min(self.size.x, self.size.y)
@@ -24,8 +25,15 @@ class Grid:
 
     def random(self, offset, size):
         return Point(
-            np.random.randint(self.minimum.x+offset.x, self.maximum.x-offset.x-size.x+1),
-            np.random.randint(self.minimum.y+offset.y, self.maximum.y-offset.y-size.y+1),
+            self.rng.integers(self.minimum.x+offset.x, self.maximum.x-offset.x-size.x+1),
+            self.rng.integers(self.minimum.y+offset.y, self.maximum.y-offset.y-size.y+1),
+        )
+
+    def randomPoints(self, count, offset, size):
+        return self.rng.integers(
+            (self.minimum.x+offset.x, self.minimum.y+offset.y),
+            (self.maximum.x-offset.x-size.x+1, self.maximum.y-offset.y-size.y+1),
+            size=(count, 2)
         )
 
     def generateObstacles(self, count, theta):
@@ -0,0 +1,242 @@
+import math
+import numpy as np
+
+from common.geometry import Line
+
+try:
+    from numba import njit, prange, set_num_threads
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import cupy as cp
+    CUPY_AVAILABLE = cp.is_available()
+except ImportError:
+    CUPY_AVAILABLE = False
+
+# the number of segment/obstacle pairs above which a generation is worth sending to the gpu
+GPU_THRESHOLD = 1000000
+
+# the cython kernel is only a fallback, so it is not built (nor its import hook installed) when numba is available
+CYTHON_AVAILABLE = False
+
+if not NUMBA_AVAILABLE:
+    try:
+        import pyximport
+        pyximport.install(language_level=3)
+        from common.kernel import cythonFitness
+        CYTHON_AVAILABLE = True
+    except ImportError:
+        pass
+
+workerContext = None
+
+
+class FitnessContext:
+    def __init__(self, grid, obstacles, basis):
+        self.edges = obstacleEdges(obstacles)
+        self.bounds = obstacleBounds(obstacles)
+        self.basis = basis
+        self.shortestLength = Line(grid.first, grid.final).length
+
+        # uploaded on first use, so that small populations never initialize the gpu
+        self.deviceEdges = None
+        self.deviceBounds = None
+
+
+def obstacleEdges(obstacles):
+    corners = np.array([obstacle.exterior.coords for obstacle in obstacles], dtype=np.float32).reshape(-1, 5, 2)
+    return np.stack((corners[:, :-1], corners[:, 1:]), axis=2)
+
+
+def cross(u, v):
+    return u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+
+
+def obstacleBounds(obstacles):
+    return np.array([obstacle.bounds for obstacle in obstacles], dtype=np.float32).reshape(-1, 4)
+
+
+def evaluatePopulation(paths, edges, bounds, shortestLength, xp=np):
+    segments = paths[:, 1:] - paths[:, :-1]
+    distances = xp.hypot(segments[..., 0], segments[..., 1]).sum(axis=1, dtype=xp.float64)
+
+    first = paths[:, :-1]
+    final = paths[:, 1:]
+    lower = xp.minimum(first, final)
+    upper = xp.maximum(first, final)
+
+    # only segment/obstacle pairs with overlapping bounding boxes (N, S-1, M) can collide
+    candidates = (
+        (upper[..., None, 0] >= bounds[:, 0]) & (lower[..., None, 0] <= bounds[:, 2]) &
+        (upper[..., None, 1] >= bounds[:, 1]) & (lower[..., None, 1] <= bounds[:, 3])
+    )
+    path, segment, obstacle = xp.nonzero(candidates)
+
+    # test each candidate segment against the four edges of its obstacle: (K, 4), in double precision like the kernels
+    p1 = first[path, segment, None].astype(xp.float64)
+    p2 = final[path, segment, None].astype(xp.float64)
+    p3 = edges[obstacle, :, 0].astype(xp.float64)
+    p4 = edges[obstacle, :, 1].astype(xp.float64)
+
+    d1 = cross(p4 - p3, p1 - p3)
+    d2 = cross(p4 - p3, p2 - p3)
+    d3 = cross(p2 - p1, p3 - p1)
+    d4 = cross(p2 - p1, p4 - p1)
+
+    # bounding boxes only matter for collinear segments, where every orientation is zero
+    overlap = (
+        (xp.minimum(p1[..., 0], p2[..., 0]) <= xp.maximum(p3[..., 0], p4[..., 0])) &
+        (xp.maximum(p1[..., 0], p2[..., 0]) >= xp.minimum(p3[..., 0], p4[..., 0])) &
+        (xp.minimum(p1[..., 1], p2[..., 1]) <= xp.maximum(p3[..., 1], p4[..., 1])) &
+        (xp.maximum(p1[..., 1], p2[..., 1]) >= xp.minimum(p3[..., 1], p4[..., 1]))
+    )
+
+    crossing = (d1 * d2 <= 0) & (d3 * d4 <= 0) & overlap
+
+    # a segment that crosses no edge still collides when it lies inside the (convex) obstacle
+    inside = xp.all(d1 >= 0, axis=-1) | xp.all(d1 <= 0, axis=-1)
+
+    hits = xp.any(crossing, axis=-1) | inside
+    collisions = 1000 * xp.bincount(path[hits], minlength=len(paths))
+
+    return xp.sqrt((distances / shortestLength) ** 2 + collisions ** 2)
+
+
+if NUMBA_AVAILABLE:
+    # no fast math here or in the kernels below (numba compiles callees with the caller's flags), so that
+    # touching contacts keep an orientation of exactly zero
+    @njit(cache=True)
+    def orientation(ax, ay, bx, by, cx, cy):
+        return (np.float64(bx) - ax) * (np.float64(cy) - ay) - (np.float64(by) - ay) * (np.float64(cx) - ax)
+
+    @njit(cache=True)
+    def segmentCollisions(x1, y1, x2, y2, edges, bounds):
+        collisions = 0
+
+        for m in range(edges.shape[0]):
+            if (
+                max(x1, x2) < bounds[m, 0] or min(x1, x2) > bounds[m, 2] or
+                max(y1, y2) < bounds[m, 1] or min(y1, y2) > bounds[m, 3]
+            ):
+                continue
+
+            crossing = False
+            positive = True
+            negative = True
+
+            for k in range(edges.shape[1]):
+                x3, y3 = edges[m, k, 0, 0], edges[m, k, 0, 1]
+                x4, y4 = edges[m, k, 1, 0], edges[m, k, 1, 1]
+
+                d1 = orientation(x3, y3, x4, y4, x1, y1)
+                d2 = orientation(x3, y3, x4, y4, x2, y2)
+                d3 = orientation(x1, y1, x2, y2, x3, y3)
+                d4 = orientation(x1, y1, x2, y2, x4, y4)
+
+                positive = positive and d1 >= 0
+                negative = negative and d1 <= 0
+
+                if (
+                    d1 * d2 <= 0 and d3 * d4 <= 0 and
+                    min(x1, x2) <= max(x3, x4) and max(x1, x2) >= min(x3, x4) and
+                    min(y1, y2) <= max(y3, y4) and max(y1, y2) >= min(y3, y4)
+                ):
+                    crossing = True
+
+            if crossing or positive or negative:
+                collisions += 1000
+
+        return collisions
+
+    @njit(parallel=True, cache=True)
+    def batchFitness(paths, edges, bounds, shortestLength):
+        scores = np.empty(paths.shape[0])
+
+        for p in prange(paths.shape[0]):
+            distance = 0.0
+            collisions = 0
+
+            for s in range(paths.shape[1] - 1):
+                x1, y1 = paths[p, s, 0], paths[p, s, 1]
+                x2, y2 = paths[p, s + 1, 0], paths[p, s + 1, 1]
+                distance += math.hypot(x2 - x1, y2 - y1)
+                collisions += segmentCollisions(x1, y1, x2, y2, edges, bounds)
+
+            scores[p] = math.sqrt((distance / shortestLength) ** 2 + collisions ** 2)
+
+        return scores
+
+    @njit(parallel=True, cache=True)
+    def bezierFitness(controlPoints, basis, edges, bounds, shortestLength):
+        curves = np.empty((controlPoints.shape[0], basis.shape[0], 2), dtype=np.float32)
+        scores = np.empty(controlPoints.shape[0])
+
+        for p in prange(controlPoints.shape[0]):
+            distance = 0.0
+            collisions = 0
+            px = 0.0
+            py = 0.0
+
+            # each sample is evaluated, measured and tested against the obstacles in the same pass
+            for s in range(basis.shape[0]):
+                x = 0.0
+                y = 0.0
+                for i in range(basis.shape[1]):
+                    x += basis[s, i] * controlPoints[p, i, 0]
+                    y += basis[s, i] * controlPoints[p, i, 1]
+
+                curves[p, s, 0] = x
+                curves[p, s, 1] = y
+
+                # continue with the stored (single precision) sample, so the score matches the curve
+                x = curves[p, s, 0]
+                y = curves[p, s, 1]
+
+                if s > 0:
+                    distance += math.hypot(x - px, y - py)
+                    collisions += segmentCollisions(px, py, x, y, edges, bounds)
+
+                px = x
+                py = y
+
+            scores[p] = math.sqrt((distance / shortestLength) ** 2 + collisions ** 2)
+
+        return curves, scores
+
+
+def evaluate(paths, context):
+    if CUPY_AVAILABLE and paths.shape[0] * (paths.shape[1] - 1) * context.edges.shape[0] > GPU_THRESHOLD:
+        if context.deviceEdges is None:
+            context.deviceEdges = cp.asarray(context.edges)
+            context.deviceBounds = cp.asarray(context.bounds)
+        scores = evaluatePopulation(
+            cp.asarray(paths), context.deviceEdges, context.deviceBounds, context.shortestLength, xp=cp
+        )
+        return cp.asnumpy(scores)
+    if NUMBA_AVAILABLE:
+        return batchFitness(paths, context.edges, context.bounds, context.shortestLength)
+    if CYTHON_AVAILABLE:
+        return cythonFitness(np.ascontiguousarray(paths), context.edges, context.bounds, context.shortestLength)
+    return evaluatePopulation(paths, context.edges, context.bounds, context.shortestLength)
+
+
+def evaluateCurves(controlPoints, context):
+    if NUMBA_AVAILABLE:
+        return bezierFitness(controlPoints, context.basis, context.edges, context.bounds, context.shortestLength)
+    curves = np.einsum('sn,pnc->psc', context.basis, controlPoints)
+    return curves, evaluatePopulation(curves, context.edges, context.bounds, context.shortestLength)
+
+
+def initWorker(context):
+    global workerContext
+    workerContext = context
+
+    # each process already owns a core, so keep numba from spawning its own threads
+    if NUMBA_AVAILABLE:
+        set_num_threads(1)
+
+
+def scoreChunk(paths):
+    return evaluate(paths, workerContext)
@@ -32,18 +32,6 @@ class Line(SLine):
         self.dy = final.y - first.y
         self.theta = np.arctan2(self.dy, self.dx)
 
-    def divide(self, d):
-        ix = self.dx / (d+1)
-        iy = self.dy / (d+1)
-        points = []
-        for i in range(1, d+1):
-            points.append(Point(
-                self.first.x+ix*i,
-                self.first.y+iy*i
-            ))
-        points.append(self.final)
-        return points
-
 
 class Polygon(SPolygon):
     def __init__(self, sx, sy, theta, t):
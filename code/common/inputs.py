@@ -71,6 +71,11 @@ def parse(filename):
         help="the orientation of obstacles (in degrees)"
     )
 
+    parser.add_argument(
+        "-sd", "--seed", type=int,
+        help="the seed used to initialize the random number generator"
+    )
+
     if filename == "genetic-algorithm":
         parser.add_argument(
             "-pc", "--populationcount", type=int,
@@ -102,6 +107,11 @@ def parse(filename):
             help="the number of evolutions to carry out"
         )
 
+        parser.add_argument(
+            "-wk", "--workers", type=int,
+            help="the number of processes used to evaluate fitness"
+        )
+
     args = parser.parse_args()
 
     arguments = {
@@ -167,6 +177,8 @@ def parse(filename):
 
     arguments["obstacleTheta"] = args.obstacletheta if args.obstacletheta is not None else 0.0
 
+    arguments["seed"] = args.seed
+
     if filename == "genetic-algorithm":
         if args.populationcount is not None and args.populationcount < 10:
             raise Exception("the population size should not be less than 10")
@@ -177,11 +189,15 @@ def parse(filename):
         if args.mutationchance is not None and (args.mutationchance < 0.0 or args.mutationchance > 1.0):
             raise Exception("the probability that mutation will occur must be between 0.0 and 1.0 (inclusive)")
 
+        if args.workers is not None and args.workers < 1:
+            raise Exception("the number of workers should not be less than 1")
+
         arguments["populationCount"] = args.populationcount if args.populationcount is not None else 80
         arguments["interpolation"] = args.interpolation if args.interpolation is not None else 8
         arguments["pathSegments"] = args.pathsegments if args.pathsegments is not None else 2
         arguments["curveSamples"] = args.curvesamples if args.curvesamples is not None else 16
         arguments["mutationChance"] = args.mutationchance if args.mutationchance is not None else 0.04
         arguments["evolutionMax"] = args.evolutionmax if args.evolutionmax is not None else 10
+        arguments["workers"] = args.workers if args.workers is not None else 1
 
     return arguments
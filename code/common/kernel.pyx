@@ -0,0 +1,82 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+
+import numpy as np
+
+from libc.math cimport sqrt, hypot
+
+
+cdef inline double orientation(double ax, double ay, double bx, double by, double cx, double cy) nogil:
+    return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+
+cdef long segmentCollisions(
+    double x1, double y1, double x2, double y2,
+    const float[:, :, :, ::1] edges, const float[:, ::1] bounds
+) nogil:
+    cdef Py_ssize_t m, k
+    cdef double x3, y3, x4, y4, d1, d2, d3, d4
+    cdef bint crossing, positive, negative
+    cdef long collisions = 0
+
+    for m in range(edges.shape[0]):
+        if (
+            max(x1, x2) < bounds[m, 0] or min(x1, x2) > bounds[m, 2] or
+            max(y1, y2) < bounds[m, 1] or min(y1, y2) > bounds[m, 3]
+        ):
+            continue
+
+        crossing = False
+        positive = True
+        negative = True
+
+        for k in range(edges.shape[1]):
+            x3 = edges[m, k, 0, 0]
+            y3 = edges[m, k, 0, 1]
+            x4 = edges[m, k, 1, 0]
+            y4 = edges[m, k, 1, 1]
+
+            d1 = orientation(x3, y3, x4, y4, x1, y1)
+            d2 = orientation(x3, y3, x4, y4, x2, y2)
+            d3 = orientation(x1, y1, x2, y2, x3, y3)
+            d4 = orientation(x1, y1, x2, y2, x4, y4)
+
+            positive = positive and d1 >= 0
+            negative = negative and d1 <= 0
+
+            crossing = crossing or (
+                d1 * d2 <= 0 and d3 * d4 <= 0 and
+                min(x1, x2) <= max(x3, x4) and max(x1, x2) >= min(x3, x4) and
+                min(y1, y2) <= max(y3, y4) and max(y1, y2) >= min(y3, y4)
+            )
+
+        if crossing or positive or negative:
+            collisions += 1000
+
+    return collisions
+
+
+def cythonFitness(
+    const float[:, :, ::1] paths, const float[:, :, :, ::1] edges, const float[:, ::1] bounds,
+    double shortestLength
+):
+    cdef Py_ssize_t p, s
+    cdef double distance
+    cdef long collisions
+
+    scores = np.empty(paths.shape[0])
+    cdef double[::1] result = scores
+
+    with nogil:
+        for p in range(paths.shape[0]):
+            distance = 0.0
+            collisions = 0
+
+            for s in range(paths.shape[1] - 1):
+                distance += hypot(paths[p, s + 1, 0] - paths[p, s, 0], paths[p, s + 1, 1] - paths[p, s, 1])
+                collisions += segmentCollisions(
+                    paths[p, s, 0], paths[p, s, 1], paths[p, s + 1, 0], paths[p, s + 1, 1], edges, bounds
+                )
+
+            result[p] = sqrt((distance / shortestLength) ** 2 + (<double> collisions) ** 2)
+
+    return scores
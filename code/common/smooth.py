@@ -1,22 +1,30 @@
+import math
 import numpy as np
 
-from scipy.special import comb
-from common.geometry import Point
+_BASIS_CACHE = {}
 
 
-def bezierCurve(points, samples):
-    t = np.linspace(0.0, 1.0, samples)
+def bezierBasis(n, samples):
+    key = (n, samples)
 
-    px = [p.x for p in points]
-    py = [p.y for p in points]
+    if key not in _BASIS_CACHE:
+        t = np.linspace(0.0, 1.0, samples)[:, None]
+        i = np.arange(1, n + 1)
 
-    polynomials = [bernsteinPolynomial(len(points) - 1, i, t) for i in range(len(points))]
+        if n < 1000:
+            # t^i and (1 - t)^i by cumulative products, and C(n, i) = C(n, i - 1) * (n - i + 1) / i
+            coefficients = np.cumprod(np.concatenate(([1.0], (n - i + 1) / i)))
+            tPower = np.cumprod(np.hstack((np.ones_like(t), np.repeat(t, n, axis=1))), axis=1)
+            uPower = np.cumprod(np.hstack((np.ones_like(t), np.repeat(1 - t, n, axis=1))), axis=1)
+            basis = coefficients * tPower * uPower[:, ::-1]
+        else:
+            # work in log space, since the coefficients overflow and the powers underflow for large n
+            coefficients = np.array([math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1) for k in range(n + 1)])
+            with np.errstate(divide="ignore"):
+                tPower = np.cumsum(np.hstack((np.zeros_like(t), np.repeat(np.log(t), n, axis=1))), axis=1)
+                uPower = np.cumsum(np.hstack((np.zeros_like(t), np.repeat(np.log1p(-t), n, axis=1))), axis=1)
+            basis = np.exp(coefficients + tPower + uPower[:, ::-1])
 
-    vx = np.dot(px, polynomials)
-    vy = np.dot(py, polynomials)
+        _BASIS_CACHE[key] = basis.astype(np.float32)
 
-    return [Point(vx[s], vy[s]) for s in range(samples)]
-
-
-def bernsteinPolynomial(n, i, t):
-    return comb(n, i) * (t ** i) * ((1 - t) ** (n - i))
+    return _BASIS_CACHE[key]
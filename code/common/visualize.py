@@ -1,9 +1,42 @@
+import os
+import matplotlib
+
+HEADLESS = os.environ.get("HEADLESS") == "1"
+
+if HEADLESS:
+    matplotlib.use("Agg")
+
 import matplotlib.pyplot as plt
 import matplotlib.patches as ptc
 
+from matplotlib.collections import PatchCollection
+
 
-def visualizeResult(grid, boundaries, obstacles, title, population=None, optimal=None):
+def createAxes():
     fig, ax = plt.subplots()
+    return ax
+
+
+def display(ax, title):
+    if HEADLESS:
+        ax.figure.savefig(title.lower().replace(" ", "-") + ".png")
+    else:
+        plt.ion()
+        plt.show()
+
+
+def rectangles(polygons, color):
+    return PatchCollection(
+        [ptc.Rectangle(polygon.datum, polygon.width, polygon.height, polygon.angle()) for polygon in polygons],
+        edgecolor='None', facecolor=color, alpha=1.0
+    )
+
+
+def visualizeResult(grid, boundaries, obstacles, title, population=None, optimal=None, ax=None):
+    if ax is None:
+        ax = createAxes()
+    else:
+        ax.cla()
 
     ax.set_title(title, weight='bold')
 
@@ -21,54 +54,36 @@ def visualizeResult(grid, boundaries, obstacles, title, population=None, optimal
         weight='bold', color='w'
     )
 
-    for obstacle in obstacles:
-        rectangle = ptc.Rectangle(
-            obstacle.datum,
-            obstacle.width,
-            obstacle.height,
-            obstacle.angle(),
-            edgecolor='None', facecolor='grey', alpha=1.0
-        )
-        ax.add_patch(rectangle)
-
-    for boundary in boundaries:
-        rectangle = ptc.Rectangle(
-            boundary.datum,
-            boundary.width,
-            boundary.height,
-            boundary.angle(),
-            edgecolor='None', facecolor='black', alpha=1.0
-        )
-        ax.add_patch(rectangle)
+    ax.add_collection(rectangles(obstacles, 'grey'))
+    ax.add_collection(rectangles(boundaries, 'black'))
 
     if population is not None:
         for path in population:
-            px = [point.x for point in path.points]
-            py = [point.y for point in path.points]
-            ax.plot(px, py, 'y-', alpha=0.2, markersize=4)
+            ax.plot(path.points[:, 0], path.points[:, 1], 'y-', alpha=0.2, markersize=4)
 
     if optimal is not None:
-        px = [point.x for point in optimal.points]
-        py = [point.y for point in optimal.points]
-        ax.plot(px, py, 'c-', alpha=0.8, markersize=4)
+        ax.plot(optimal.points[:, 0], optimal.points[:, 1], 'c-', alpha=0.8, markersize=4)
 
     ax.plot(grid.first.x, grid.first.y, 'co')
     ax.plot(grid.final.x, grid.final.y, 'mo')
 
     ax.grid()
 
-    plt.axis('scaled')
+    ax.axis('scaled')
 
-    plt.ion()
-    plt.show()
+    display(ax, title)
 
 
-def scatterPlot(x, y, title, xlabel, ylabel):
-    fig, ax = plt.subplots()
+def scatterPlot(x, y, title, xlabel, ylabel, ax=None):
+    if ax is None:
+        ax = createAxes()
+    else:
+        ax.cla()
+
     ax.set_title(title)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
-    plt.scatter(x, y, marker='o', c='c')
-    plt.grid()
-    plt.ion()
-    plt.show()
+    ax.scatter(x, y, marker='o', c='c')
+    ax.grid()
+
+    display(ax, title)
@@ -1,105 +1,72 @@
 import time
+import heapq
+import operator
+import multiprocessing
 
 import numpy as np
 
+from concurrent.futures import ProcessPoolExecutor
+
 import common.environment as environment
 import common.inputs as inputs
 
-from common.visualize import visualizeResult, scatterPlot
-from common.geometry import Point, Line
-from common.smooth import bezierCurve
+from common.visualize import HEADLESS, createAxes, visualizeResult, scatterPlot
+from common.geometry import Point
+from common.smooth import bezierBasis
+from common.fitness import FitnessContext, evaluate, evaluateCurves, initWorker, scoreChunk
 
 
 class Path:
-    def __init__(self, points):
-        self.score = np.inf
-        self.points = points
-
-    def fitness(self, obstacles, shortest):
-        distance = 0
-        collisions = 0
+    def __init__(self, points, score=np.inf):
+        self.score = score
+        self.points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
 
-        for i in range(len(self.points) - 1):
-            segment = Line(self.points[i], self.points[i + 1])
-            distance += segment.length
-            for obstacle in obstacles:
-                if segment.intersects(obstacle):
-                    collisions += 1000
 
-        self.score = np.sqrt((distance / shortest.length) ** 2 + collisions ** 2)
+def individuals(grid, count, interpolation, segments):
+    waypoints = np.concatenate((
+        np.broadcast_to(grid.first.center, (count, 1, 2)),
+        grid.randomPoints(count * (segments - 1), grid.size, Point(0, 0)).reshape(count, segments - 1, 2),
+        np.broadcast_to(grid.final.center, (count, 1, 2))
+    ), axis=1).astype(np.float32)
 
+    # interpolate every segment of every path at once: (count, segments, interpolation + 1, 2)
+    t = (np.arange(1, interpolation + 2)[:, None] / (interpolation + 1)).astype(np.float32)
+    first = waypoints[:, :-1, None]
+    final = waypoints[:, 1:, None]
+    points = (first + (final - first) * t).reshape(count, -1, 2)
 
-def individual(grid, interpolation, segments):
-    points = [grid.first]
+    return np.concatenate((waypoints[:, :1], points), axis=1)
 
-    for s in range(segments):
-        nextPoint = grid.random(grid.size, Point(0, 0)) if s < segments-1 else grid.final
-        segment = Line(points[-1], nextPoint)
-        points.extend(segment.divide(interpolation))
 
-    return points
+def grade(paths, context, pool=None, workers=1):
+    if pool is None:
+        return evaluate(paths, context)
+    return np.concatenate(list(pool.map(scoreChunk, np.array_split(paths, workers))))
 
 
 def evolve(population, grid, count, chance):
-    children = []
-    while len(children) < count:
-        parentA = np.random.randint(0, len(population))
-        parentB = np.random.randint(0, len(population))
-        if parentA != parentB:
-            pathA = population[parentA].points
-            pathB = population[parentB].points
-            crossoverPosition = len(pathA) // 2
-            child = pathA[:crossoverPosition] + pathB[crossoverPosition:]
-            if np.random.random() <= chance:
-                mutationPosition = np.random.randint(0, len(child))
-                child[mutationPosition] = grid.random(grid.size, Point(0, 0))
-            children.append(child)
-    return children
-
-
-def select(graded, evolved, count):
-    graded.extend(evolved)
-    graded = sort(graded)
-
-    # truncation selection
-    if len(graded) > count:
-        graded = graded[:count]
-
-    return graded
-
-
-def sort(population):
-    if len(population) <= 1:
-        return population
+    paths = np.array([path.points for path in population])
 
-    mid = len(population) // 2
+    # offsetting the second parent by [1, N) never picks the first one again, so no pair has to be redrawn
+    parentA = grid.rng.integers(0, len(population), size=count)
+    parentB = (parentA + grid.rng.integers(1, len(population), size=count)) % len(population)
 
-    left = sort(population[:mid])
-    right = sort(population[mid:])
+    mutations = grid.rng.random(count) <= chance
+    mutationPositions = grid.rng.integers(0, paths.shape[1], size=count)
+    mutationPoints = grid.randomPoints(count, grid.size, Point(0, 0))
 
-    return merge(left, right, population.copy())
+    crossoverPosition = paths.shape[1] // 2
+    children = np.empty((count, paths.shape[1], 2), dtype=np.float32)
+    children[:, :crossoverPosition] = paths[parentA, :crossoverPosition]
+    children[:, crossoverPosition:] = paths[parentB, crossoverPosition:]
+    children[mutations, mutationPositions[mutations]] = mutationPoints[mutations]
 
+    return children
 
-def merge(left, right, population):
-    leftPosition = 0
-    rightPosition = 0
-
-    while leftPosition < len(left) and rightPosition < len(right):
-
-        if left[leftPosition].score <= right[rightPosition].score:
-            population[leftPosition + rightPosition] = left[leftPosition]
-            leftPosition += 1
-        else:
-            population[leftPosition + rightPosition] = right[rightPosition]
-            rightPosition += 1
-
-    for leftPosition in range(leftPosition, len(left)):
-        population[leftPosition + rightPosition] = left[leftPosition]
-
-    for rightPosition in range(rightPosition, len(right)):
-        population[leftPosition + rightPosition] = right[rightPosition]
 
-    return population
+def select(graded, evolved, count):
+    # truncation selection, keeping only the best paths on a heap instead of sorting them all
+    return heapq.nsmallest(count, graded + evolved, key=operator.attrgetter("score"))
 
 
 def main():
@@ -107,21 +74,36 @@ def main():
     arguments = inputs.parse(filename)
 
     grid, boundaries, obstacles = environment.generate(arguments)
-    visualizeResult(grid, boundaries, obstacles, "Environment")
+
+    # interactive windows stay open side by side, whereas off-screen renders can share one figure
+    ax = createAxes() if HEADLESS else None
+
+    visualizeResult(grid, boundaries, obstacles, "Environment", ax=ax)
 
     startTime = time.time()
 
-    shortestPath = Line(grid.first, grid.final)
+    # everything that stays fixed during evolution is computed once, before the first generation
+    basis = bezierBasis(arguments["pathSegments"] * (arguments["interpolation"] + 1), arguments["curveSamples"])
+    context = FitnessContext(grid, obstacles, basis)
+
+    workers = arguments["workers"]
+    pool = None
+    if workers > 1:
+        # numba's threading layers are not all fork-safe, so workers are spawned rather than forked
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=initWorker, initargs=(context,)
+        )
+
+    controlPoints = individuals(
+        grid, arguments["populationCount"], arguments["interpolation"], arguments["pathSegments"]
+    )
 
-    initialPopulation = []
+    curves, scores = evaluateCurves(controlPoints, context)
 
-    for _ in range(arguments["populationCount"]):
-        path = Path(individual(grid, arguments["interpolation"], arguments["pathSegments"]))
-        path.points = bezierCurve(path.points, arguments["curveSamples"])
-        path.fitness(obstacles, shortestPath)
-        initialPopulation.append(path)
+    initialPopulation = [Path(points, score) for points, score in zip(curves, scores)]
 
-    gradedPopulation = sort(initialPopulation)
+    gradedPopulation = sorted(initialPopulation, key=operator.attrgetter("score"))
 
     finalPopulation = None
     optimalPath = None
@@ -132,19 +114,14 @@ def main():
     while evolutionCount < arguments["evolutionMax"]:
         evolvedPaths = evolve(gradedPopulation, grid, arguments["populationCount"], arguments["mutationChance"])
 
-        evolvedPopulation = []
+        scores = grade(evolvedPaths, context, pool, workers)
 
-        for points in evolvedPaths:
-            path = Path(points)
-            path.fitness(obstacles, shortestPath)
-            evolvedPopulation.append(path)
+        evolvedPopulation = [Path(points, score) for points, score in zip(evolvedPaths, scores)]
 
         gradedPopulation = select(gradedPopulation, evolvedPopulation, arguments["populationCount"])
 
-        average = 0
-        for path in gradedPopulation:
-            average += path.score
-        average /= len(gradedPopulation)
+        gradedScores = np.fromiter((path.score for path in gradedPopulation), dtype=np.float64, count=len(gradedPopulation))
+        average = gradedScores.mean()
 
         averageFitness.append(average)
 
@@ -152,7 +129,7 @@ def main():
             print(
                 "Evolution:", evolutionCount + 1,
                 "| Average Fitness:", average,
-                "| Best Fitness Value:", gradedPopulation[0].score
+                "| Best Fitness Value:", gradedScores[0]
             )
 
         evolutionCount += 1
@@ -161,20 +138,24 @@ def main():
             finalPopulation = gradedPopulation
             optimalPath = gradedPopulation[0]
 
+    if pool is not None:
+        pool.shutdown()
+
     endTime = time.time()
 
     print("Time Elapsed:", endTime - startTime)
 
-    visualizeResult(grid, boundaries, obstacles, "Initial Population", initialPopulation)
-    visualizeResult(grid, boundaries, obstacles, "Final Population", finalPopulation)
-    visualizeResult(grid, boundaries, obstacles, "Optimal Path", None, optimalPath)
+    visualizeResult(grid, boundaries, obstacles, "Initial Population", initialPopulation, ax=ax)
+    visualizeResult(grid, boundaries, obstacles, "Final Population", finalPopulation, ax=ax)
+    visualizeResult(grid, boundaries, obstacles, "Optimal Path", None, optimalPath, ax=ax)
 
     scatterPlot(
         np.arange(1, arguments["evolutionMax"] + 1), averageFitness,
-        "Average Fitness of Population", "Evolution", "Fitness Value"
+        "Average Fitness of Population", "Evolution", "Fitness Value", ax=ax
     )
 
-    input("Press Enter to Exit")
+    if not HEADLESS:
+        input("Press Enter to Exit")
 
 
 if __name__ == "__main__":